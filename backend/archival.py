@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from pymongo import ReplaceOne
+from driver_scoring import add_archived_trip_totals
+from tenancy import DEFAULT_TENANT
+
+logger = logging.getLogger(__name__)
+
+async def archive_batch(source, target, query: dict, batch_size: int, on_moved=None) -> int:
+    """Move documents matching `query` from `source` into `target`, one batch at a time.
+
+    Each document is copied first (an upsert keyed on _id, so a run
+    interrupted before the delete just redoes it) and then deleted from
+    `source` using the whole document as the filter. If the document was
+    changed or deleted in between, that delete matches nothing and the
+    archive copy is withdrawn: a user's delete is never resurrected, and a
+    changed document is reconsidered on the next pass.
+
+    `on_moved`, if given, is awaited with each batch of documents that
+    actually left `source`.
+    """
+    moved = 0
+    while True:
+        docs = await source.find(query).limit(batch_size).to_list(batch_size)
+        if not docs:
+            return moved
+        await target.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs],
+            ordered=False,
+        )
+        archived, withdrawn = [], []
+        for doc in docs:
+            result = await source.delete_one(doc)
+            if result.deleted_count:
+                archived.append(doc)
+            else:
+                withdrawn.append(doc["_id"])
+        if withdrawn:
+            await target.delete_many({"_id": {"$in": withdrawn}})
+        if archived and on_moved is not None:
+            await on_moved(archived)
+        moved += len(archived)
+        if len(docs) < batch_size:
+            return moved
+
+async def archive_history(db, alert_retention_days: int, trip_retention_days: int, batch_size: int = 500) -> dict:
+    """Move read alerts and completed trips past their retention, with the trips' events, out of the hot collections."""
+    now = datetime.now(timezone.utc)
+    trip_cutoff = now - timedelta(days=trip_retention_days)
+    alerts = await archive_batch(
+        db.alerts,
+        db.alerts_archive,
+        {"read": True, "timestamp": {"$lt": now - timedelta(days=alert_retention_days)}},
+        batch_size,
+    )
+
+    # A trip's events go with the trip, so a trip that is still hot keeps its whole log
+    events = 0
+
+    async def archive_trip_events(trips: list):
+        nonlocal events
+        trip_ids = {}
+        for trip in trips:
+            trip_ids.setdefault(trip.get("tenant", DEFAULT_TENANT), []).append(trip["_id"])
+        for tenant, ids in trip_ids.items():
+            query = {"tenant": tenant, "trip": {"$in": ids}}
+            events += await archive_batch(db.trip_events, db.trip_events_archive, query, batch_size)
+
+    async def on_trips_moved(moved: list):
+        await add_archived_trip_totals(db, moved)
+        await archive_trip_events(moved)
+
+    trips = await archive_batch(
+        db.trips,
+        db.trips_archive,
+        # A trip whose completion is still being finished stays until it is done
+        {"status": "completed", "actualEnd": {"$lt": trip_cutoff}, "pendingEvent": None},
+        batch_size,
+        on_moved=on_trips_moved,
+    )
+    # Events left behind by a run interrupted between moving trips and their events.
+    # An archived trip ended before the cutoff, so all of its events are older too.
+    stale_trips = await db.trip_events.distinct("trip", {"timestamp": {"$lt": trip_cutoff}})
+    if stale_trips:
+        orphaned = await db.trips_archive.find({"_id": {"$in": stale_trips}}, {"tenant": 1}).to_list(None)
+        await archive_trip_events(orphaned)
+
+    if alerts or trips or events:
+        logger.info(f"Archived {alerts} alerts, {trips} trips and {events} trip events")
+    return {"alerts": alerts, "trips": trips, "tripEvents": events}
@@ -0,0 +1,45 @@
+# Indexes superseded by the tenant-leading ones below, per collection
+REPLACED_INDEXES = {
+    "trips": ["driver_1_startTime_-1", "status_1_driver_1"],
+    "vehicles": ["driver_1"],
+    "drivers": ["status_1"],
+    "trip_events": ["trip_1_timestamp_1"],
+    "alerts_archive": ["timestamp_-1"],
+    "trips_archive": ["driver_1_startTime_-1"],
+}
+
+async def drop_replaced_indexes(db):
+    for name, index_names in REPLACED_INDEXES.items():
+        existing = await db[name].index_information()
+        for index_name in index_names:
+            if index_name in existing:
+                await db[name].drop_index(index_name)
+
+async def ensure_indexes(db):
+    """Create the secondary indexes the routes rely on. Safe to run on every startup.
+
+    Request-path indexes lead with tenant, since every route query is tenant-scoped.
+    """
+    # Per-driver trip history, newest first
+    await db.trips.create_index([("tenant", 1), ("driver", 1), ("startTime", -1)])
+    # Batch driver scoring scans completed trips per driver
+    await db.trips.create_index([("tenant", 1), ("status", 1), ("driver", 1)])
+    await db.vehicles.create_index([("tenant", 1), ("driver", 1)])
+    await db.drivers.create_index([("tenant", 1), ("status", 1)])
+    await db.alerts.create_index([("tenant", 1), ("timestamp", -1)])
+    # Append-only trip lifecycle log, read back per trip in order
+    await db.trip_events.create_index([("tenant", 1), ("trip", 1), ("timestamp", 1)])
+    # Trip events whose follow-up writes were interrupted, swept by a job
+    await db.trips.create_index([("pendingEvent.event.timestamp", 1)], sparse=True)
+    # Retention scans for the archive job run across all tenants in the database
+    await db.alerts.create_index([("read", 1), ("timestamp", 1)])
+    await db.trips.create_index([("status", 1), ("actualEnd", 1)])
+    await db.trip_events.create_index([("timestamp", 1)])
+    # Archive tiers are read only through include_archived listings
+    await db.alerts_archive.create_index([("tenant", 1), ("timestamp", -1)])
+    await db.trips_archive.create_index([("tenant", 1), ("driver", 1), ("startTime", -1)])
+    await db.trip_events_archive.create_index([("tenant", 1), ("trip", 1), ("timestamp", 1)])
+    # Counters of archived trips, so driver rescoring never reads the archive tier
+    await db.driver_archive_totals.create_index([("tenant", 1), ("driver", 1)], unique=True)
+    # Don't keep paying for the pre-tenancy indexes on the hot collections
+    await drop_replaced_indexes(db)
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from pymongo import ReturnDocument, UpdateOne
+from tenancy import DEFAULT_TENANT
+
+# Scoring weights (sum to 100)
+ON_TIME_WEIGHT = 60
+SAFETY_WEIGHT = 25
+LOAD_WEIGHT = 15
+
+# Average load at which a driver gets the full load credit
+REFERENCE_LOAD_KG = 20000
+
+# Hours on duty after which a driver is considered fully fatigued
+MAX_DUTY_HOURS = 11
+
+def _as_utc(value: datetime) -> datetime:
+    # Mongo hands back naive datetimes that are already UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def score_from_totals(total_trips, on_time_trips, incidents, total_load_kg):
+    """Compute (performanceScore, riskContribution, onTimeDelivery) from trip counters.
+
+    Works on plain numbers as well as pandas Series, so the batch job and the
+    incremental update share one formula.
+    """
+    trips = np.maximum(total_trips, 1)
+    on_time_rate = on_time_trips / trips
+    incident_rate = np.minimum(incidents / trips, 1)
+    load_factor = np.minimum(total_load_kg / trips / REFERENCE_LOAD_KG, 1)
+
+    performance = np.clip(np.round(
+        ON_TIME_WEIGHT * on_time_rate
+        + SAFETY_WEIGHT * (1 - incident_rate)
+        + LOAD_WEIGHT * load_factor
+    ), 0, 100)
+    risk = np.clip(np.round(50 * (1 - on_time_rate) + 50 * incident_rate), 0, 100)
+    on_time = np.round(100 * on_time_rate)
+    return performance, risk, on_time
+
+def fatigue_level(hours_since_rest: float) -> int:
+    return int(min(100, round(hours_since_rest / MAX_DUTY_HOURS * 100)))
+
+COUNTERS = ["totalTrips", "onTimeTrips", "incidents", "totalLoadKg"]
+
+def trip_totals(trips: list) -> pd.DataFrame:
+    """Per-(tenant, driver) trip counters for a list of completed trips."""
+    columns = ["tenant", "driver", "expectedEnd", "actualEnd", "loadWeight", "incidents"]
+    df = pd.DataFrame(trips).reindex(columns=columns)
+    expected_end = pd.to_datetime(df["expectedEnd"], utc=True)
+    actual_end = pd.to_datetime(df["actualEnd"], utc=True)
+    df["onTime"] = actual_end.notna() & (actual_end <= expected_end)
+    df["incidents"] = df["incidents"].fillna(0)
+    df["loadWeight"] = df["loadWeight"].fillna(0)
+    df["tenant"] = df["tenant"].fillna(DEFAULT_TENANT)
+
+    return df.groupby(["tenant", "driver"]).agg(
+        totalTrips=("onTime", "size"),
+        onTimeTrips=("onTime", "sum"),
+        incidents=("incidents", "sum"),
+        totalLoadKg=("loadWeight", "sum"),
+    )
+
+def score_trip_history(trips: list, archived_totals: list = ()) -> dict:
+    """Aggregate completed trips into per-driver counters and scores.
+
+    `archived_totals` are the stored counters of trips already archived
+    (driver_archive_totals documents) and are added on top of the hot trips.
+    Pure and CPU-bound, so the job runner can ship it to a worker process.
+    """
+    totals = trip_totals(trips)
+    if archived_totals:
+        archived = pd.DataFrame(list(archived_totals)).set_index(["tenant", "driver"])[COUNTERS]
+        totals = totals.add(archived, fill_value=0)
+
+    performance, risk, on_time = score_from_totals(
+        totals["totalTrips"], totals["onTimeTrips"], totals["incidents"], totals["totalLoadKg"]
+    )
+    totals["performanceScore"] = performance
+    totals["riskContribution"] = risk
+    totals["onTimeDelivery"] = on_time
+    return totals.astype(int).to_dict("index")
+
+async def add_archived_trip_totals(db, trips: list):
+    """Fold trips that were just archived into driver_archive_totals.
+
+    Runs right after the trips leave the hot collection, so rescoring never
+    has to read the archive tier back. A crash between the two steps loses
+    that batch's contribution to the rebuilt counters.
+    """
+    completed = [trip for trip in trips if trip.get("status") == "completed" and trip.get("driver")]
+    if not completed:
+        return
+    totals = trip_totals(completed).astype(int).to_dict("index")
+    await db.driver_archive_totals.bulk_write(
+        [
+            UpdateOne({"tenant": tenant, "driver": driver}, {"$inc": counters}, upsert=True)
+            for (tenant, driver), counters in totals.items()
+        ],
+        ordered=False,
+    )
+
+async def recompute_driver_scores(db, offload=None, tenant: str = None) -> int:
+    """Rebuild every driver's counters and scores from hot trips plus the stored
+    totals of archived trips.
+
+    `offload` is an optional coroutine function used to run the pandas step
+    elsewhere (see JobContext.run_in_process). Pass `tenant` to rescore a
+    single tenant instead of every tenant in `db`.
+    """
+    projection = {"_id": 0, "tenant": 1, "driver": 1, "expectedEnd": 1, "actualEnd": 1, "loadWeight": 1, "incidents": 1}
+    query = {"status": "completed", "driver": {"$ne": None}}
+    totals_query = {}
+    if tenant is not None:
+        query["tenant"] = tenant
+        totals_query["tenant"] = tenant
+    trips = await db.trips.find(query, projection).to_list(None)
+    archived_totals = await db.driver_archive_totals.find(totals_query, {"_id": 0}).to_list(None)
+    if not trips and not archived_totals:
+        return 0
+
+    if offload is None:
+        scores = score_trip_history(trips, archived_totals)
+    else:
+        scores = await offload(score_trip_history, trips, archived_totals)
+
+    operations = [
+        UpdateOne({"_id": driver_id, "tenant": driver_tenant}, {"$set": fields})
+        for (driver_tenant, driver_id), fields in scores.items()
+    ]
+    result = await db.drivers.bulk_write(operations, ordered=False)
+    return result.matched_count
+
+async def record_trip_completion(db, trip: dict):
+    """Fold a single completed trip into its driver's counters and score.
+
+    The trip id is added to the driver's pendingTrips in the same write, so a
+    retry does not count the trip twice; the caller pulls it once all of the
+    trip's follow-up writes are done.
+    """
+    if not trip.get("driver"):
+        return None
+
+    actual_end = trip.get("actualEnd")
+    on_time = actual_end is not None and _as_utc(actual_end) <= _as_utc(trip["expectedEnd"])
+    driver_filter = {"_id": trip["driver"], "tenant": trip.get("tenant", DEFAULT_TENANT)}
+    driver = await db.drivers.find_one_and_update(
+        {**driver_filter, "pendingTrips": {"$ne": trip["_id"]}},
+        {
+            "$inc": {
+                "totalTrips": 1,
+                "onTimeTrips": int(on_time),
+                "incidents": trip.get("incidents", 0),
+                "totalLoadKg": trip.get("loadWeight", 0),
+            },
+            "$push": {"pendingTrips": trip["_id"]},
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    if driver is None:
+        # No such driver, or an earlier attempt already counted this trip
+        driver = await db.drivers.find_one(driver_filter)
+        if driver is None:
+            return None
+
+    performance, risk, on_time_pct = score_from_totals(
+        driver["totalTrips"], driver["onTimeTrips"], driver["incidents"], driver["totalLoadKg"]
+    )
+    scores = {
+        "performanceScore": int(performance),
+        "riskContribution": int(risk),
+        "onTimeDelivery": int(on_time_pct),
+    }
+    # Only write if no other completion has landed since our $inc, so a stale
+    # snapshot never overwrites a newer score
+    await db.drivers.update_one(
+        {"_id": driver["_id"], "tenant": driver["tenant"], "totalTrips": driver["totalTrips"]},
+        {"$set": scores},
+    )
+    driver.update(scores)
+    return driver
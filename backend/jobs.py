@@ -0,0 +1,299 @@
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# The job whose coroutine is currently running, so offloaded work can be attributed to it
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+class CronSchedule:
+    """Minimal five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Supports '*', numbers, ranges ('1-5'), lists ('0,30') and steps ('*/15').
+    Times are evaluated in UTC; day-of-week 0 (or 7) is Sunday.
+    """
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        self.days_restricted = fields[2] != "*"
+        self.weekdays_restricted = fields[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> set:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/")
+                step = int(step_text)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(value) for value in part.split("-"))
+            else:
+                start = end = int(part)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        # Classic cron: when both day fields are restricted, either may match
+        if self.days_restricted and self.weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never fires: '{self.expression}'")
+
+class Job:
+    """A periodic background job.
+
+    Give either `interval` (seconds) or `cron`. Leased jobs run on exactly one
+    worker per scheduled slot; unleased jobs run on every worker (for
+    per-process state such as in-memory buffers). Essential jobs are scheduled
+    even when optional background work is disabled, and do not wait on the
+    runner's concurrency limit.
+    """
+
+    def __init__(self, name: str, func, interval: float = None, cron: str = None,
+                 timeout: float = 300, jitter: float = 0, lease: bool = True, essential: bool = False):
+        if (interval is None) == (cron is None):
+            raise ValueError(f"Job '{name}' needs exactly one of interval or cron")
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.cron = CronSchedule(cron) if cron else None
+        self.timeout = timeout
+        self.jitter = jitter
+        self.lease = lease
+        self.essential = essential
+        self.stats = {
+            "runs": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "skipped": 0,
+            "lastStarted": None,
+            "lastDurationMs": None,
+            "maxDurationMs": 0,
+            "totalDurationMs": 0,
+            "lastQueueWaitMs": None,
+            "lastError": None,
+            "poolRecycles": 0,
+            "orphanedThreads": 0,
+        }
+
+    def next_run(self, now: datetime) -> datetime:
+        if self.cron:
+            return self.cron.next_after(now)
+        return now + timedelta(seconds=self.interval)
+
+class JobContext:
+    """What a job function receives: the database and a way to offload CPU-bound work."""
+
+    def __init__(self, db, runner):
+        self.db = db
+        self._runner = runner
+
+    async def run_in_process(self, func, *args):
+        return await self._runner.run_in_process(func, *args)
+
+class JobRunner:
+    """In-process scheduler started from the FastAPI lifespan."""
+
+    def __init__(self, db, max_concurrency: int = 2, process_workers: int = 1):
+        self.db = db
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.jobs = {}
+        self.context = JobContext(db, self)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._process_workers = process_workers
+        self._pool = None
+        self._tasks = []
+        self.loop_lag = {"lastMs": 0, "maxMs": 0}
+
+    def add(self, job: Job):
+        self.jobs[job.name] = job
+
+    async def run_in_process(self, func, *args):
+        """Run `func(*args)` in the process pool (or a thread if there is none).
+
+        A job timeout cancels only the await, not the offloaded work. For the
+        process pool we therefore kill and recreate the pool, which also fails
+        any other job's work running in it at that moment. Threads cannot be
+        stopped: they run to completion and are counted as orphanedThreads.
+        """
+        job = _current_job.get()
+        # Without a process pool, at least keep CPU work off the event loop thread
+        if self._process_workers < 1:
+            try:
+                return await asyncio.to_thread(func, *args)
+            except asyncio.CancelledError:
+                if job is not None:
+                    job.stats["orphanedThreads"] += 1
+                logger.warning(f"Abandoned offloaded thread work for job {job.name if job else '?'}; it keeps running")
+                raise
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+        except asyncio.CancelledError:
+            if job is not None:
+                job.stats["poolRecycles"] += 1
+            self._recycle_pool()
+            raise
+
+    def _recycle_pool(self):
+        if self._pool is None:
+            return
+        # ProcessPoolExecutor has no public way to stop running work, so terminate its workers
+        for process in list((self._pool._processes or {}).values()):
+            process.terminate()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    async def _acquire_lease(self, job: Job, until: datetime) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.job_leases.find_one_and_update(
+                {"_id": job.name, "$or": [{"expiresAt": {"$lte": now}}, {"owner": self.worker_id}]},
+                {"$set": {"owner": self.worker_id, "expiresAt": until, "acquiredAt": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            return False
+        return True
+
+    async def run_once(self, job: Job) -> bool:
+        """Run a job now if this worker can take its lease. Returns False if skipped."""
+        queued = time.perf_counter()
+        if job.essential:
+            return await self._run_leased(job, queued)
+        async with self._semaphore:
+            return await self._run_leased(job, queued)
+
+    async def _run_leased(self, job: Job, queued: float) -> bool:
+        if job.lease:
+            # Taken only once a concurrency slot is granted, so time spent queued
+            # never eats into the lease. Held until this job's next slot so
+            # late-ticking workers skip this one.
+            now = datetime.now(timezone.utc)
+            until = max(job.next_run(now), now + timedelta(seconds=job.timeout))
+            if not await self._acquire_lease(job, until):
+                job.stats["skipped"] += 1
+                return False
+        await self._execute(job, queued)
+        return True
+
+    async def _execute(self, job: Job, queued: float):
+        started = time.perf_counter()
+        job.stats["lastQueueWaitMs"] = round((started - queued) * 1000, 1)
+        job.stats["lastStarted"] = datetime.now(timezone.utc)
+        token = _current_job.set(job)
+        try:
+            await asyncio.wait_for(job.func(self.context), timeout=job.timeout)
+            job.stats["lastError"] = None
+        except asyncio.TimeoutError:
+            job.stats["timeouts"] += 1
+            job.stats["lastError"] = f"Timed out after {job.timeout}s"
+            logger.warning(f"Job {job.name} timed out after {job.timeout}s")
+        except Exception as e:
+            job.stats["failures"] += 1
+            job.stats["lastError"] = str(e)
+            logger.exception(f"Job {job.name} failed")
+        finally:
+            _current_job.reset(token)
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            job.stats["runs"] += 1
+            job.stats["lastDurationMs"] = duration_ms
+            job.stats["maxDurationMs"] = max(job.stats["maxDurationMs"], duration_ms)
+            job.stats["totalDurationMs"] += duration_ms
+
+    async def _schedule(self, job: Job):
+        while True:
+            now = datetime.now(timezone.utc)
+            delay = (job.next_run(now) - now).total_seconds() + random.uniform(0, job.jitter)
+            await asyncio.sleep(delay)
+            try:
+                await self.run_once(job)
+            except Exception as e:
+                # e.g. Mongo unreachable while taking the lease: try again next slot
+                job.stats["failures"] += 1
+                job.stats["lastError"] = str(e)
+                logger.exception(f"Could not run job {job.name}")
+
+    async def _watch_loop_lag(self, interval: float = 0.5):
+        # How late the event loop wakes us up: sustained lag means request handling is starved
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lag_ms = round(max(0, time.perf_counter() - expected) * 1000, 1)
+            self.loop_lag["lastMs"] = lag_ms
+            self.loop_lag["maxMs"] = max(self.loop_lag["maxMs"], lag_ms)
+
+    def start(self, essential_only: bool = False):
+        jobs = [job for job in self.jobs.values() if job.essential or not essential_only]
+        self._tasks = [asyncio.create_task(self._schedule(job)) for job in jobs]
+        self._tasks.append(asyncio.create_task(self._watch_loop_lag()))
+        logger.info(f"Started {len(jobs)} background jobs on worker {self.worker_id}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._recycle_pool()
+
+    def status(self) -> dict:
+        jobs = []
+        for job in self.jobs.values():
+            runs = job.stats["runs"]
+            jobs.append({
+                "name": job.name,
+                "schedule": job.cron.expression if job.cron else f"every {job.interval}s",
+                "leased": job.lease,
+                "essential": job.essential,
+                "avgDurationMs": round(job.stats["totalDurationMs"] / runs, 1) if runs else None,
+                **job.stats,
+            })
+        return {"worker": self.worker_id, "loopLag": self.loop_lag, "jobs": jobs}
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field, ConfigDict, EmailStr, BeforeValidator
-from typing import List, Optional, Any, Annotated
+from typing import List, Optional, Any, Annotated, Literal
 from datetime import datetime, timezone
 import uuid
+from tenancy import DEFAULT_TENANT
 
 # Helper to handle ObjectId to str conversion
 PyObjectId = Annotated[str, BeforeValidator(str)]
@@ -9,18 +10,27 @@ PyObjectId = Annotated[str, BeforeValidator(str)]
 class MongoBaseModel(BaseModel):
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
 
+    def to_mongo(self) -> dict:
+        # model_dump(by_alias=True) emits "id" (the serialization alias), so store it as "_id" explicitly
+        data = self.model_dump()
+        data["_id"] = data.pop("id")
+        return data
+
 class User(MongoBaseModel):
     id: Optional[PyObjectId] = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id", serialization_alias="id")
     email: EmailStr
     hashed_password: str
     name: str
     role: str = "user" # admin or user
+    tenant: str = DEFAULT_TENANT
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
     name: str
+
+class TenantUserCreate(UserCreate):
     role: str = "manager"
 
 class UserLogin(BaseModel):
@@ -43,6 +53,7 @@ class Telemetry(BaseModel):
 
 class Vehicle(MongoBaseModel):
     id: Optional[PyObjectId] = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id", serialization_alias="id")
+    tenant: str = DEFAULT_TENANT
     name: str
     type: str
     status: str # active, maintenance, etc.
@@ -60,21 +71,101 @@ class Vehicle(MongoBaseModel):
 
 class Trip(MongoBaseModel):
     id: Optional[PyObjectId] = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id", serialization_alias="id")
+    tenant: str = DEFAULT_TENANT
     route: str
     vehicle: str
     driver: str
-    status: str # in-progress, completed, etc.
+    # Free-form on read so legacy statuses still list; new values are
+    # constrained by TripCreate and the trip_lifecycle TRANSITIONS
+    status: str = "scheduled" # scheduled, in-progress, completed, cancelled
     loadWeight: int
     startTime: datetime
+    actualStart: Optional[datetime] = None
     expectedEnd: datetime
     actualEnd: Optional[datetime] = None
     breakdownRisk: int
     aiConfidence: int
     predictedIssues: List[str] = []
     progress: int = 0
+    incidents: int = 0
+    distanceKm: int = 0
+
+class TripCreate(BaseModel):
+    # Planning fields only; progress, incidents and distance are maintained by the server
+    route: str
+    vehicle: str
+    driver: str
+    # Trips start here; completion and cancellation go through trip events
+    status: Literal["scheduled", "in-progress"] = "scheduled"
+    loadWeight: int
+    startTime: datetime
+    expectedEnd: datetime
+    breakdownRisk: int
+    aiConfidence: int
+    predictedIssues: List[str] = []
+
+class TripEvent(MongoBaseModel):
+    id: Optional[PyObjectId] = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id", serialization_alias="id")
+    tenant: str = DEFAULT_TENANT
+    trip: str
+    type: str # start, complete, cancel
+    fromStatus: str
+    toStatus: str
+    user: Optional[str] = None
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    incidents: int = 0
+    distanceKm: int = 0
+    note: Optional[str] = None
+
+class TripEventCreate(BaseModel):
+    type: str
+    incidents: int = Field(default=0, ge=0)
+    distanceKm: int = Field(default=0, ge=0)
+    note: Optional[str] = None
+
+class TripProgress(BaseModel):
+    progress: int = Field(ge=0, le=100)
+
+class Driver(MongoBaseModel):
+    id: Optional[PyObjectId] = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id", serialization_alias="id")
+    tenant: str = DEFAULT_TENANT
+    name: str
+    phone: Optional[str] = None
+    experience: int = 0
+    status: str = "active" # active, inactive
+    currentVehicle: Optional[str] = None
+    currentTrip: Optional[str] = None
+    licenseExpiry: Optional[str] = None
+    # Trip history counters, maintained incrementally by driver_scoring
+    totalTrips: int = 0
+    onTimeTrips: int = 0
+    incidents: int = 0
+    totalLoadKg: int = 0
+    performanceScore: int = 0
+    riskContribution: int = 0
+    onTimeDelivery: int = 0
+    # Duty tracking
+    hoursDriven: float = 0
+    hoursSinceRest: float = 0
+    fatigueLevel: int = 0
+    lastRestAt: Optional[datetime] = None
+
+class DriverCreate(BaseModel):
+    # Profile only; counters, scores and fatigue are maintained by the server
+    name: str
+    phone: Optional[str] = None
+    experience: int = 0
+    status: str = "active"
+    currentVehicle: Optional[str] = None
+    currentTrip: Optional[str] = None
+    licenseExpiry: Optional[str] = None
+
+class DriverHours(BaseModel):
+    hours: float = Field(gt=0)
 
 class Alert(MongoBaseModel):
     id: Optional[PyObjectId] = Field(default_factory=lambda: str(uuid.uuid4()), alias="_id", serialization_alias="id")
+    tenant: str = DEFAULT_TENANT
     type: str # critical, warning, info
     title: str
     message: str
@@ -1,27 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
+import heapq
 from models import Alert
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from routes.auth import get_current_user, get_db
+from routes.auth import get_current_user, get_tenant_db
 from bson import ObjectId
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
 @router.get("/", response_model=List[Alert])
-async def get_alerts(db: AsyncIOMotorDatabase = Depends(get_db), current_user = Depends(get_current_user)):
-    alerts = await db.alerts.find({}).sort("timestamp", -1).to_list(1000)
+async def get_alerts(include_archived: bool = False, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    alerts = await db.alerts.find({"tenant": current_user.tenant}).sort("timestamp", -1).to_list(1000)
+    if include_archived:
+        archived = await db.alerts_archive.find({"tenant": current_user.tenant}).sort("timestamp", -1).to_list(1000)
+        # Both lists are already newest-first, so merge them instead of re-sorting
+        alerts = list(heapq.merge(alerts, archived, key=lambda alert: alert["timestamp"], reverse=True))[:1000]
     return alerts
 
 @router.put("/{alert_id}/read")
-async def mark_alert_read(alert_id: str, db: AsyncIOMotorDatabase = Depends(get_db), current_user = Depends(get_current_user)):
-    result = await db.alerts.update_one({"_id": alert_id}, {"$set": {"read": True}})
+async def mark_alert_read(alert_id: str, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    result = await db.alerts.update_one({"_id": alert_id, "tenant": current_user.tenant}, {"$set": {"read": True}})
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Alert not found")
     return {"message": "Alert marked as read"}
 
 @router.delete("/{alert_id}")
-async def delete_alert(alert_id: str, db: AsyncIOMotorDatabase = Depends(get_db), current_user = Depends(get_current_user)):
-    result = await db.alerts.delete_one({"_id": alert_id})
+async def delete_alert(alert_id: str, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    result = await db.alerts.delete_one({"_id": alert_id, "tenant": current_user.tenant})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Alert not found")
     return {"message": "Alert deleted"}
@@ -4,8 +4,9 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from models import User, UserCreate, Token, UserLogin
+from models import User, UserCreate, TenantUserCreate, Token, UserLogin
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from tenancy import DEFAULT_TENANT, new_tenant_id
 import os
 
 # Security configuration
@@ -46,6 +47,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotor
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
+        tenant: Optional[str] = payload.get("tenant")
         if email is None:
             raise credentials_exception
     except JWTError:
@@ -54,6 +56,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotor
     user = await db.users.find_one({"email": email})
     if user is None:
         raise credentials_exception
+    # Tokens issued before tenancy carry no claim; otherwise it must match the user
+    if tenant is not None and tenant != user.get("tenant", DEFAULT_TENANT):
+        raise credentials_exception
     
     # Convert _id to string to satisfy Pydantic model
     if "_id" in user:
@@ -61,8 +66,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncIOMotor
         
     return User(**user)
 
-@router.post("/register", response_model=User)
-async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
+def get_tenant_db(request: Request, current_user: User = Depends(get_current_user)):
+    return request.app.state.tenant_dbs.for_tenant(current_user.tenant)
+
+async def create_user(db: AsyncIOMotorDatabase, user: UserCreate, tenant: str, role: str) -> User:
     existing_user = await db.users.find_one({"email": user.email})
     if existing_user:
         raise HTTPException(
@@ -73,13 +80,28 @@ async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_db))
     hashed_password = get_password_hash(user.password)
     user_dict = user.model_dump()
     user_dict["hashed_password"] = hashed_password
+    user_dict["tenant"] = tenant
+    user_dict["role"] = role
     del user_dict["password"]
     
     new_user = User(**user_dict)
-    await db.users.insert_one(new_user.model_dump(by_alias=True))
+    await db.users.insert_one(new_user.to_mongo())
     
     return new_user
 
+@router.post("/register", response_model=User)
+async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
+    # A self-service sign-up starts a new, empty tenant and administers it;
+    # joining an existing tenant takes an invite from one of its admins
+    return await create_user(db, user, new_tenant_id(), "admin")
+
+@router.post("/users", response_model=User)
+async def create_tenant_user(user: TenantUserCreate, db: AsyncIOMotorDatabase = Depends(get_db), current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can add users")
+    # New users join the inviting admin's tenant
+    return await create_user(db, user, current_user.tenant, user.role)
+
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncIOMotorDatabase = Depends(get_db)):
     user = await db.users.find_one({"email": form_data.username})
@@ -92,7 +114,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncIOMot
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["email"], "role": user["role"]}, expires_delta=access_token_expires
+        data={"sub": user["email"], "role": user["role"], "tenant": user.get("tenant", DEFAULT_TENANT)},
+        expires_delta=access_token_expires
     )
     
     return {
@@ -116,7 +139,8 @@ async def login_json(user_login: UserLogin, db: AsyncIOMotorDatabase = Depends(g
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["email"], "role": user["role"]}, expires_delta=access_token_expires
+        data={"sub": user["email"], "role": user["role"], "tenant": user.get("tenant", DEFAULT_TENANT)},
+        expires_delta=access_token_expires
     )
     
     return {
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List
+import heapq
+import uuid
+from datetime import datetime, timezone
+from pymongo import ReturnDocument
+from models import Driver, DriverCreate, DriverHours, Trip
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from routes.auth import get_current_user, get_tenant_db
+from routes.jobs import get_job_runner
+from driver_scoring import fatigue_level, recompute_driver_scores
+
+router = APIRouter(prefix="/drivers", tags=["drivers"])
+
+@router.get("/", response_model=List[Driver])
+async def get_drivers(db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    drivers = await db.drivers.find({"tenant": current_user.tenant}).to_list(1000)
+    return drivers
+
+@router.get("/{driver_id}", response_model=Driver)
+async def get_driver(driver_id: str, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    driver = await db.drivers.find_one({"_id": driver_id, "tenant": current_user.tenant})
+    if not driver:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    return driver
+
+@router.get("/{driver_id}/trips", response_model=List[Trip])
+async def get_driver_trips(driver_id: str, limit: int = 100, include_archived: bool = False, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    # Served by the (tenant, driver, startTime) index on both tiers
+    limit = max(1, min(limit, 1000))
+    trips = await db.trips.find({"tenant": current_user.tenant, "driver": driver_id}).sort("startTime", -1).to_list(limit)
+    if include_archived:
+        archived = await db.trips_archive.find({"tenant": current_user.tenant, "driver": driver_id}).sort("startTime", -1).to_list(limit)
+        trips = list(heapq.merge(trips, archived, key=lambda trip: trip["startTime"], reverse=True))[:limit]
+    return trips
+
+@router.post("/", response_model=Driver)
+async def create_driver(profile: DriverCreate, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can create drivers")
+
+    driver = Driver(**profile.model_dump(), id=str(uuid.uuid4()), tenant=current_user.tenant)
+    await db.drivers.insert_one(driver.to_mongo())
+    return driver
+
+@router.delete("/{driver_id}")
+async def delete_driver(driver_id: str, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can delete drivers")
+
+    result = await db.drivers.delete_one({"_id": driver_id, "tenant": current_user.tenant})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    return {"message": "Driver deleted"}
+
+@router.put("/{driver_id}/hours", response_model=Driver)
+async def log_driver_hours(driver_id: str, shift: DriverHours, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    driver = await db.drivers.find_one_and_update(
+        {"_id": driver_id, "tenant": current_user.tenant},
+        {"$inc": {"hoursDriven": shift.hours, "hoursSinceRest": shift.hours}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not driver:
+        raise HTTPException(status_code=404, detail="Driver not found")
+
+    driver["fatigueLevel"] = fatigue_level(driver["hoursSinceRest"])
+    # Only write if no other shift or rest has landed since our $inc, so a stale
+    # snapshot never overwrites a newer fatigue level
+    await db.drivers.update_one(
+        {"_id": driver_id, "tenant": current_user.tenant, "hoursSinceRest": driver["hoursSinceRest"]},
+        {"$set": {"fatigueLevel": driver["fatigueLevel"]}},
+    )
+    return driver
+
+@router.put("/{driver_id}/rest", response_model=Driver)
+async def record_driver_rest(driver_id: str, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    driver = await db.drivers.find_one_and_update(
+        {"_id": driver_id, "tenant": current_user.tenant},
+        {"$set": {"hoursSinceRest": 0, "fatigueLevel": 0, "lastRestAt": datetime.now(timezone.utc)}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not driver:
+        raise HTTPException(status_code=404, detail="Driver not found")
+    return driver
+
+@router.post("/score")
+async def score_drivers(db: AsyncIOMotorDatabase = Depends(get_tenant_db), runner = Depends(get_job_runner), current_user = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can rescore drivers")
+
+    # The pandas step runs in the job runner's worker process, off the event loop
+    updated = await recompute_driver_scores(db, offload=runner.run_in_process, tenant=current_user.tenant)
+    return {"message": "Driver scores recomputed", "updated": updated}
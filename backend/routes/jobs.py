@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from routes.auth import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+def get_job_runner(request: Request):
+    return request.app.state.job_runner
+
+@router.get("/")
+async def get_job_status(runner = Depends(get_job_runner), current_user = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view background jobs")
+    return runner.status()
+
+@router.post("/{job_name}/run")
+async def run_job(job_name: str, runner = Depends(get_job_runner), current_user = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can run background jobs")
+
+    job = runner.jobs.get(job_name)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not await runner.run_once(job):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job is leased by another worker")
+    return {"message": f"Job {job_name} finished", "stats": job.stats}
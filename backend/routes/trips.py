@@ -1,17 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from typing import List
-from models import Trip
+import uuid
+from datetime import datetime, timezone
+from models import Trip, TripCreate, TripEvent, TripEventCreate, TripProgress
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from routes.auth import get_current_user, get_db
+from routes.auth import get_current_user, get_tenant_db
+from trip_lifecycle import InvalidTransition, TripNotFound, apply_trip_event
 
 router = APIRouter(prefix="/trips", tags=["trips"])
 
+def get_progress_coalescer(request: Request):
+    return request.app.state.progress_coalescer
+
 @router.get("/", response_model=List[Trip])
-async def get_trips(db: AsyncIOMotorDatabase = Depends(get_db), current_user = Depends(get_current_user)):
-    trips = await db.trips.find({}).to_list(1000)
+async def get_trips(include_archived: bool = False, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    trips = await db.trips.find({"tenant": current_user.tenant}).to_list(1000)
+    if include_archived and len(trips) < 1000:
+        trips += await db.trips_archive.find({"tenant": current_user.tenant}).to_list(1000 - len(trips))
     return trips
 
 @router.post("/", response_model=Trip)
-async def create_trip(trip: Trip, db: AsyncIOMotorDatabase = Depends(get_db), current_user = Depends(get_current_user)):
-    await db.trips.insert_one(trip.model_dump(by_alias=True))
+async def create_trip(plan: TripCreate, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    trip = Trip(
+        **plan.model_dump(),
+        id=str(uuid.uuid4()),
+        tenant=current_user.tenant,
+        actualStart=datetime.now(timezone.utc) if plan.status == "in-progress" else None,
+    )
+    await db.trips.insert_one(trip.to_mongo())
+    return trip
+
+@router.post("/{trip_id}/events", response_model=Trip)
+async def create_trip_event(trip_id: str, event: TripEventCreate, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    try:
+        trip = await apply_trip_event(db, current_user.tenant, trip_id, event, user=current_user.email)
+    except TripNotFound:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    except InvalidTransition as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     return trip
+
+@router.get("/{trip_id}/events", response_model=List[TripEvent])
+async def get_trip_events(trip_id: str, include_archived: bool = False, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    query = {"tenant": current_user.tenant, "trip": trip_id}
+    events = await db.trip_events.find(query).sort("timestamp", 1).to_list(1000)
+    if include_archived:
+        # Archived events are always older than the hot ones
+        archived = await db.trip_events_archive.find(query).sort("timestamp", 1).to_list(1000)
+        events = (archived + events)[-1000:]
+    return events
+
+@router.post("/{trip_id}/progress", status_code=status.HTTP_202_ACCEPTED)
+async def report_trip_progress(trip_id: str, ping: TripProgress, coalescer = Depends(get_progress_coalescer), current_user = Depends(get_current_user)):
+    # Buffered; written on the next coalescer flush
+    coalescer.submit(current_user.tenant, trip_id, ping.progress)
+    return {"message": "Progress accepted"}
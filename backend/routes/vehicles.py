@@ -1,27 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
+import uuid
 from models import Vehicle
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from routes.auth import get_current_user, get_db
+from routes.auth import get_current_user, get_tenant_db
 
 router = APIRouter(prefix="/vehicles", tags=["vehicles"])
 
 @router.get("/", response_model=List[Vehicle])
-async def get_vehicles(db: AsyncIOMotorDatabase = Depends(get_db), current_user = Depends(get_current_user)):
-    vehicles = await db.vehicles.find({}).to_list(1000)
+async def get_vehicles(db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    vehicles = await db.vehicles.find({"tenant": current_user.tenant}).to_list(1000)
     return vehicles
 
 @router.get("/{vehicle_id}", response_model=Vehicle)
-async def get_vehicle(vehicle_id: str, db: AsyncIOMotorDatabase = Depends(get_db), current_user = Depends(get_current_user)):
-    vehicle = await db.vehicles.find_one({"_id": vehicle_id})
+async def get_vehicle(vehicle_id: str, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
+    vehicle = await db.vehicles.find_one({"_id": vehicle_id, "tenant": current_user.tenant})
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     return vehicle
 
 @router.post("/", response_model=Vehicle)
-async def create_vehicle(vehicle: Vehicle, db: AsyncIOMotorDatabase = Depends(get_db), current_user = Depends(get_current_user)):
+async def create_vehicle(vehicle: Vehicle, db: AsyncIOMotorDatabase = Depends(get_tenant_db), current_user = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can create vehicles")
         
-    await db.vehicles.insert_one(vehicle.model_dump(by_alias=True))
+    vehicle.id = str(uuid.uuid4())
+    vehicle.tenant = current_user.tenant
+    await db.vehicles.insert_one(vehicle.to_mongo())
     return vehicle
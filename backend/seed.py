@@ -5,6 +5,9 @@ from passlib.context import CryptContext
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 from pathlib import Path
+from db_indexes import ensure_indexes
+from driver_scoring import recompute_driver_scores
+from tenancy import backfill_default_tenant
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -256,11 +259,80 @@ async def seed_alerts():
     await db.alerts.insert_many(alerts)
     print("Alerts seeded")
 
+async def seed_drivers():
+    await db.drivers.delete_many({})
+
+    drivers = [
+      {
+        "_id": "DRV001",
+        "name": "Rajesh Kumar",
+        "phone": "+91 98765 43210",
+        "experience": 8,
+        "status": "active",
+        "currentVehicle": "VH001",
+        "currentTrip": "TRP001",
+        "licenseExpiry": "2027-03-15",
+        "hoursDriven": 5,
+        "hoursSinceRest": 5,
+        "fatigueLevel": 45
+      },
+      {
+        "_id": "DRV002",
+        "name": "Amit Singh",
+        "phone": "+91 98765 43211",
+        "experience": 12,
+        "status": "active",
+        "currentVehicle": "VH002",
+        "currentTrip": "TRP002",
+        "licenseExpiry": "2026-11-20",
+        "hoursDriven": 2,
+        "hoursSinceRest": 2,
+        "fatigueLevel": 18
+      },
+      {
+        "_id": "DRV003",
+        "name": "Suresh Patil",
+        "phone": "+91 98765 43212",
+        "experience": 15,
+        "status": "active",
+        "currentVehicle": "VH004",
+        "currentTrip": None,
+        "licenseExpiry": "2028-01-10"
+      },
+      {
+        "_id": "DRV004",
+        "name": "Vikram Desai",
+        "phone": "+91 98765 43213",
+        "experience": 6,
+        "status": "active",
+        "currentVehicle": "VH005",
+        "currentTrip": None,
+        "licenseExpiry": "2026-08-05"
+      },
+      {
+        "_id": "DRV005",
+        "name": "Mohammed Ali",
+        "phone": "+91 98765 43214",
+        "experience": 10,
+        "status": "inactive",
+        "currentVehicle": None,
+        "currentTrip": None,
+        "licenseExpiry": "2027-05-18"
+      }
+    ]
+
+    await db.drivers.insert_many(drivers)
+    print("Drivers seeded")
+
 async def main():
     await seed_users()
     await seed_vehicles()
     await seed_trips()
     await seed_alerts()
+    await seed_drivers()
+    await backfill_default_tenant(db)
+    await ensure_indexes(db)
+    await recompute_driver_scores(db)
     client.close()
 
 if __name__ == "__main__":
@@ -11,7 +11,13 @@ from passlib.context import CryptContext
 from datetime import datetime, timezone
 
 # Import routers
-from routes import auth, vehicles, trips, alerts
+from routes import auth, vehicles, trips, alerts, drivers, jobs as jobs_routes
+from db_indexes import ensure_indexes
+from trip_lifecycle import ProgressCoalescer, finish_pending_trip_events
+from driver_scoring import recompute_driver_scores
+from jobs import Job, JobRunner
+from archival import archive_history
+from tenancy import TenantDatabases, backfill_default_tenant, parse_tenant_databases
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -27,6 +33,24 @@ logger = logging.getLogger(__name__)
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 db_name = os.environ.get('DB_NAME', 'okgaadi')
 
+# Tenants given their own database, e.g. "bigfleet:okgaadi_bigfleet"; the rest share db_name
+tenant_databases = parse_tenant_databases(os.environ.get('TENANT_DATABASES', ''))
+
+# Trip progress pings are coalesced to one write per trip per interval
+progress_flush_seconds = float(os.environ.get('PROGRESS_FLUSH_SECONDS', '5'))
+
+# Background jobs
+jobs_enabled = os.environ.get('JOBS_ENABLED', 'true').lower() == 'true'
+job_max_concurrency = int(os.environ.get('JOB_MAX_CONCURRENCY', '2'))
+job_process_workers = int(os.environ.get('JOB_PROCESS_WORKERS', '1'))
+driver_scoring_cron = os.environ.get('DRIVER_SCORING_CRON', '*/15 * * * *')
+
+# Retention: read alerts and completed trips older than this move to *_archive collections
+alert_retention_days = int(os.environ.get('ALERT_RETENTION_DAYS', '30'))
+trip_retention_days = int(os.environ.get('TRIP_RETENTION_DAYS', '90'))
+archive_batch_size = int(os.environ.get('ARCHIVE_BATCH_SIZE', '500'))
+archive_cron = os.environ.get('ARCHIVE_CRON', '0 3 * * *')
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 @asynccontextmanager
@@ -175,8 +199,55 @@ async def lifespan(app: FastAPI):
         ]
         await app.db.alerts.insert_many(alerts)
 
+        # Seed Drivers
+        logger.info("Seeding mock database with drivers...")
+        drivers = [
+          {"_id": "DRV001", "name": "Rajesh Kumar", "phone": "+91 98765 43210", "experience": 8, "status": "active", "currentVehicle": "VH001"},
+          {"_id": "DRV002", "name": "Amit Singh", "phone": "+91 98765 43211", "experience": 12, "status": "active", "currentVehicle": "VH002"},
+          {"_id": "DRV003", "name": "Suresh Patil", "phone": "+91 98765 43212", "experience": 15, "status": "active", "currentVehicle": "VH003"},
+          {"_id": "DRV004", "name": "Vikram Desai", "phone": "+91 98765 43213", "experience": 6, "status": "active", "currentVehicle": "VH004"},
+          {"_id": "DRV005", "name": "Mohammed Ali", "phone": "+91 98765 43214", "experience": 10, "status": "active", "currentVehicle": "VH005"}
+        ]
+        await app.db.drivers.insert_many(drivers)
+
+    tenant_dbs = TenantDatabases(app.mongo_client, db_name, tenant_databases)
+    app.state.tenant_dbs = tenant_dbs
+    for db in tenant_dbs.all():
+        await backfill_default_tenant(db)
+        await ensure_indexes(db)
+
+    async def score_drivers(ctx):
+        for db in tenant_dbs.all():
+            await recompute_driver_scores(db, offload=ctx.run_in_process)
+
+    async def finish_trip_events(ctx):
+        for db in tenant_dbs.all():
+            await finish_pending_trip_events(db)
+
+    async def archive_all(ctx):
+        for db in tenant_dbs.all():
+            await archive_history(db, alert_retention_days, trip_retention_days, archive_batch_size)
+
+    coalescer = ProgressCoalescer(tenant_dbs)
+    app.state.progress_coalescer = coalescer
+
+    runner = JobRunner(app.db, max_concurrency=job_max_concurrency, process_workers=job_process_workers)
+    # Every worker buffers its own pings, so this one is not leased. It is essential:
+    # it must keep draining the buffer even with JOBS_ENABLED=false, and must not
+    # queue behind scoring or archival for a concurrency slot.
+    runner.add(Job("flush-trip-progress", lambda ctx: coalescer.flush(),
+                   interval=progress_flush_seconds, timeout=30, lease=False, essential=True))
+    # Repairs vehicle/driver totals and the event log after an interrupted trip event
+    runner.add(Job("finish-trip-events", finish_trip_events, interval=60, timeout=120, essential=True))
+    runner.add(Job("driver-scoring", score_drivers, cron=driver_scoring_cron, timeout=600, jitter=30))
+    runner.add(Job("archive-history", archive_all, cron=archive_cron, timeout=1800, jitter=60))
+    app.state.job_runner = runner
+    runner.start(essential_only=not jobs_enabled)
+
     yield
     # Shutdown
+    await runner.stop()
+    await coalescer.flush()
     app.mongo_client.close()
     logger.info("Disconnected from MongoDB")
 
@@ -202,6 +273,8 @@ app.include_router(auth.router, prefix="/api")
 app.include_router(vehicles.router, prefix="/api")
 app.include_router(trips.router, prefix="/api")
 app.include_router(alerts.router, prefix="/api")
+app.include_router(drivers.router, prefix="/api")
+app.include_router(jobs_routes.router, prefix="/api")
 
 @app.get("/")
 async def root():
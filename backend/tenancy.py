@@ -0,0 +1,42 @@
+import uuid
+
+DEFAULT_TENANT = "default"
+
+# Collections whose documents carry a tenant field
+TENANT_COLLECTIONS = ["users", "vehicles", "trips", "alerts", "drivers", "trip_events", "trips_archive", "alerts_archive",
+                      "trip_events_archive"]
+
+def new_tenant_id() -> str:
+    return f"tenant-{uuid.uuid4().hex}"
+
+def parse_tenant_databases(value: str) -> dict:
+    """Parse "tenantA:db_a,tenantB:db_b" into {"tenantA": "db_a", "tenantB": "db_b"}."""
+    mapping = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        tenant, _, db_name = entry.partition(":")
+        if not tenant or not db_name:
+            raise ValueError(f"Invalid TENANT_DATABASES entry '{entry}', expected tenant:database")
+        mapping[tenant.strip()] = db_name.strip()
+    return mapping
+
+class TenantDatabases:
+    """Resolves a tenant to its database on the shared Motor client.
+
+    Most tenants share the default database and are separated by the tenant
+    field; large tenants can be given a dedicated database.
+    """
+
+    def __init__(self, client, default_db_name: str, dedicated: dict = None):
+        self.default = client[default_db_name]
+        self.dedicated = {tenant: client[db_name] for tenant, db_name in (dedicated or {}).items()}
+
+    def for_tenant(self, tenant: str):
+        return self.dedicated.get(tenant, self.default)
+
+    def all(self) -> list:
+        return [self.default, *self.dedicated.values()]
+
+async def backfill_default_tenant(db):
+    """Assign documents written before tenancy existed to the default tenant."""
+    for name in TENANT_COLLECTIONS:
+        await db[name].update_many({"tenant": {"$exists": False}}, {"$set": {"tenant": DEFAULT_TENANT}})
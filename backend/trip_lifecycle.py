@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from models import TripEvent, TripEventCreate
+from driver_scoring import record_trip_completion
+
+# event type -> (statuses it may be applied from, resulting status)
+TRANSITIONS = {
+    "start": ({"scheduled"}, "in-progress"),
+    "complete": ({"in-progress"}, "completed"),
+    "cancel": ({"scheduled", "in-progress"}, "cancelled"),
+}
+
+class InvalidTransition(Exception):
+    pass
+
+class TripNotFound(Exception):
+    pass
+
+async def apply_trip_event(db, tenant: str, trip_id: str, event: TripEventCreate, user: str = None) -> dict:
+    """Validate and apply a lifecycle event, returning the updated trip.
+
+    The status check, the update and a pending copy of the event happen in
+    one conditional write, so two concurrent events cannot both move the trip
+    out of the same state. The follow-up writes (event log, vehicle and driver
+    totals) are done by finish_trip_event, which is safe to re-run: if they
+    fail, resending the event, the trip's next event or the
+    finish_pending_trip_events job completes them.
+    """
+    if event.type not in TRANSITIONS:
+        raise InvalidTransition(f"Unknown trip event '{event.type}'")
+    allowed_from, to_status = TRANSITIONS[event.type]
+
+    now = datetime.now(timezone.utc)
+    updates = {"status": to_status}
+    if event.type == "start":
+        # startTime stays the planned start
+        updates["actualStart"] = now
+    elif event.type == "complete":
+        updates.update({"actualEnd": now, "progress": 100})
+
+    # A trip takes each transition at most once, so trip + type identifies the event
+    trip_event = TripEvent(
+        id=f"{trip_id}:{event.type}",
+        tenant=tenant,
+        trip=trip_id,
+        type=event.type,
+        fromStatus="",
+        toStatus=to_status,
+        user=user,
+        timestamp=now,
+        incidents=event.incidents,
+        distanceKm=event.distanceKm,
+        note=event.note,
+    )
+
+    trip = await _claim_transition(db, tenant, trip_id, allowed_from, updates, trip_event, event)
+    if trip is None:
+        current = await db.trips.find_one({"_id": trip_id, "tenant": tenant})
+        if current is None:
+            raise TripNotFound(trip_id)
+        pending = current.get("pendingEvent")
+        if pending is None:
+            raise InvalidTransition(f"Cannot {event.type} a trip that is {current['status']}")
+        # An earlier event on this trip was interrupted: complete it first
+        await finish_trip_event(db, current)
+        if pending["event"]["_id"] == trip_event.id:
+            # This is a retry of that event, which has now fully taken effect
+            return current
+        trip = await _claim_transition(db, tenant, trip_id, allowed_from, updates, trip_event, event)
+        if trip is None:
+            raise InvalidTransition(f"Cannot {event.type} a trip that is {current['status']}")
+
+    await finish_trip_event(db, trip)
+    return trip
+
+async def _claim_transition(db, tenant, trip_id, allowed_from, updates, trip_event, event):
+    # One conditional write per source state, so fromStatus is known exactly
+    for from_status in sorted(allowed_from):
+        trip_event.fromStatus = from_status
+        trip_update = {"$set": {**updates, "pendingEvent": {"event": trip_event.to_mongo(), "state": "pending"}}}
+        if event.incidents or event.distanceKm:
+            trip_update["$inc"] = {"incidents": event.incidents, "distanceKm": event.distanceKm}
+        trip = await db.trips.find_one_and_update(
+            {"_id": trip_id, "tenant": tenant, "status": from_status, "pendingEvent": None},
+            trip_update,
+            return_document=ReturnDocument.AFTER,
+        )
+        if trip is not None:
+            return trip
+    return None
+
+async def finish_trip_event(db, trip: dict):
+    """Carry out the follow-up writes of a trip's pending event, then clear it.
+
+    Every step may be repeated: the event has a stable _id, and the vehicle
+    and driver only take a trip's totals while the trip is not yet in their
+    pendingTrips. Those guards are released once the totals are in (state
+    "applied"), and the pending event is cleared last.
+    """
+    pending = trip["pendingEvent"]
+    event = pending["event"]
+    tenant = trip["tenant"]
+    trip_filter = {"_id": trip["_id"], "tenant": tenant, "pendingEvent.event._id": event["_id"]}
+    completes = event["type"] == "complete"
+
+    if pending["state"] == "pending":
+        try:
+            await db.trip_events.insert_one(event)
+        except DuplicateKeyError:
+            pass
+        if completes:
+            await db.vehicles.update_one(
+                {"_id": trip["vehicle"], "tenant": tenant, "pendingTrips": {"$ne": trip["_id"]}},
+                {"$inc": {"totalTrips": 1, "totalKm": trip.get("distanceKm", 0)}, "$push": {"pendingTrips": trip["_id"]}},
+            )
+            await record_trip_completion(db, trip)
+        await db.trips.update_one(trip_filter, {"$set": {"pendingEvent.state": "applied"}})
+
+    if completes:
+        await db.vehicles.update_one({"_id": trip["vehicle"], "tenant": tenant}, {"$pull": {"pendingTrips": trip["_id"]}})
+        await db.drivers.update_one({"_id": trip["driver"], "tenant": tenant}, {"$pull": {"pendingTrips": trip["_id"]}})
+    await db.trips.update_one(trip_filter, {"$unset": {"pendingEvent": ""}})
+    del trip["pendingEvent"]
+
+async def finish_pending_trip_events(db, older_than: timedelta = timedelta(minutes=5)) -> int:
+    """Finish events whose request died before their follow-up writes were done.
+
+    Only events older than `older_than` are picked up, so requests still in
+    flight are left to finish their own.
+    """
+    cutoff = datetime.now(timezone.utc) - older_than
+    trips = await db.trips.find({"pendingEvent.event.timestamp": {"$lt": cutoff}}).to_list(None)
+    for trip in trips:
+        await finish_trip_event(db, trip)
+    return len(trips)
+
+class ProgressCoalescer:
+    """Buffers vehicle progress pings; each flush writes at most once per trip.
+
+    The buffer is partitioned per tenant and each partition is flushed to that
+    tenant's database. Flushed periodically by an unleased job, since every
+    worker has its own buffer.
+    """
+
+    def __init__(self, tenant_dbs):
+        self.tenant_dbs = tenant_dbs
+        self._pending = {}
+
+    def submit(self, tenant: str, trip_id: str, progress: int):
+        # Keep only the furthest progress seen since the last flush
+        trips = self._pending.setdefault(tenant, {})
+        trips[trip_id] = max(progress, trips.get(trip_id, 0))
+
+    async def flush(self) -> int:
+        """Write buffered progress, one bulk write per tenant.
+
+        A tenant whose write fails has its pings put back for the next flush
+        ($max makes the retry safe); other tenants are still written. The last
+        error is re-raised afterwards so the job records the failure.
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        written = 0
+        error = None
+        for tenant, trips in pending.items():
+            operations = [
+                UpdateOne({"_id": trip_id, "tenant": tenant, "status": "in-progress"}, {"$max": {"progress": progress}})
+                for trip_id, progress in trips.items()
+            ]
+            try:
+                await self.tenant_dbs.for_tenant(tenant).trips.bulk_write(operations, ordered=False)
+            except Exception as e:
+                for trip_id, progress in trips.items():
+                    self.submit(tenant, trip_id, progress)
+                error = e
+                continue
+            written += len(operations)
+        if error is not None:
+            raise error
+        return written
+
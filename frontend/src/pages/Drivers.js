@@ -1,4 +1,5 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
@@ -18,20 +19,45 @@ import {
   CheckCircle2,
   Clock
 } from 'lucide-react';
-import { mockDrivers } from '../mock/data';
 import { useAuth } from '../context/AuthContext';
 import { toast } from '../hooks/use-toast';
 
 const Drivers = () => {
   const { isAdmin } = useAuth();
-  const [drivers, setDrivers] = useState(mockDrivers);
+  const [drivers, setDrivers] = useState([]);
   const [searchQuery, setSearchQuery] = useState('');
+  const [loading, setLoading] = useState(true);
+
+  useEffect(() => {
+    fetchDrivers();
+  }, []);
+
+  const fetchDrivers = async () => {
+    try {
+      const response = await axios.get(`${process.env.REACT_APP_BACKEND_URL}/api/drivers/`);
+      setDrivers(response.data);
+    } catch (error) {
+      console.error("Error fetching drivers:", error);
+      toast({
+        title: 'Error',
+        description: 'Failed to fetch drivers',
+        variant: 'destructive'
+      });
+    } finally {
+      setLoading(false);
+    }
+  };
 
   const filteredDrivers = drivers.filter(driver => 
     driver.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
     driver.id.toLowerCase().includes(searchQuery.toLowerCase())
   );
 
+  const averageOf = (field) => {
+    if (drivers.length === 0) return 0;
+    return Math.round(drivers.reduce((sum, d) => sum + d[field], 0) / drivers.length);
+  };
+
   const getPerformanceColor = (score) => {
     if (score >= 90) return 'text-green-600 bg-green-100 dark:bg-green-900/20';
     if (score >= 75) return 'text-blue-600 bg-blue-100 dark:bg-blue-900/20';
@@ -51,14 +77,28 @@ const Drivers = () => {
       : 'bg-gray-100 text-gray-700 dark:bg-gray-800 dark:text-gray-400';
   };
 
-  const handleDelete = (driverId) => {
-    setDrivers(drivers.filter(d => d.id !== driverId));
-    toast({
-      title: 'Driver Removed',
-      description: 'Driver has been removed from the system'
-    });
+  const handleDelete = async (driverId) => {
+    try {
+      await axios.delete(`${process.env.REACT_APP_BACKEND_URL}/api/drivers/${driverId}`);
+      setDrivers(drivers.filter(d => d.id !== driverId));
+      toast({
+        title: 'Driver Removed',
+        description: 'Driver has been removed from the system'
+      });
+    } catch (error) {
+      console.error("Error deleting driver:", error);
+      toast({
+        title: 'Error',
+        description: 'Failed to remove driver',
+        variant: 'destructive'
+      });
+    }
   };
 
+  if (loading) {
+    return <div className="p-8 text-center">Loading drivers...</div>;
+  }
+
   return (
     <div className="space-y-6 animate-in fade-in duration-500">
       {/* Header */}
@@ -138,7 +178,7 @@ const Drivers = () => {
               <div>
                 <p className="text-sm text-gray-600 dark:text-gray-400">Avg Performance</p>
                 <p className="text-2xl font-bold text-blue-600">
-                  {Math.round(drivers.reduce((sum, d) => sum + d.performanceScore, 0) / drivers.length)}%
+                  {averageOf('performanceScore')}%
                 </p>
               </div>
               <Award className="h-8 w-8 text-blue-600" />
@@ -151,7 +191,7 @@ const Drivers = () => {
               <div>
                 <p className="text-sm text-gray-600 dark:text-gray-400">On Time Delivery</p>
                 <p className="text-2xl font-bold text-teal-600">
-                  {Math.round(drivers.reduce((sum, d) => sum + d.onTimeDelivery, 0) / drivers.length)}%
+                  {averageOf('onTimeDelivery')}%
                 </p>
               </div>
               <Clock className="h-8 w-8 text-teal-600" />
@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# The backend is run from its own directory (uvicorn server:app), so import it the same way
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+@pytest.fixture
+def client():
+    return AsyncMongoMockClient()
+
+@pytest.fixture
+def db(client):
+    return client["okgaadi_test"]
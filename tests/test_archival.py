@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from archival import archive_batch, archive_history
+
+OLD = datetime.now(timezone.utc) - timedelta(days=400)
+
+def test_resumes_after_interruption(db):
+    async def scenario():
+        docs = [{"_id": f"A{i}", "tenant": "default", "read": True} for i in range(5)]
+        await db.alerts.insert_many(docs)
+        # A previous run copied A0 and A1 but died before deleting them
+        await db.alerts_archive.insert_many(docs[:2])
+
+        moved = await archive_batch(db.alerts, db.alerts_archive, {"read": True}, batch_size=2)
+        assert moved == 5
+        assert await db.alerts.count_documents({}) == 0
+        assert sorted(await db.alerts_archive.distinct("_id")) == [f"A{i}" for i in range(5)]
+
+    asyncio.run(scenario())
+
+def test_document_deleted_mid_archive_is_not_resurrected(db):
+    class DeletingSource:
+        """Source that deletes A1 behind the archiver's back after it was read."""
+        def __init__(self, collection):
+            self.collection = collection
+
+        def find(self, *args, **kwargs):
+            return self.collection.find(*args, **kwargs)
+
+        async def delete_one(self, doc):
+            if doc["_id"] == "A0":
+                await self.collection.delete_one({"_id": "A1"})
+            return await self.collection.delete_one(doc)
+
+    async def scenario():
+        await db.alerts.insert_many([{"_id": "A0", "read": True}, {"_id": "A1", "read": True}])
+        moved = await archive_batch(DeletingSource(db.alerts), db.alerts_archive, {"read": True}, batch_size=10)
+        assert moved == 1
+        assert await db.alerts_archive.distinct("_id") == ["A0"]
+
+    asyncio.run(scenario())
+
+def test_archive_history_keeps_driver_totals(db):
+    async def scenario():
+        await db.trips.insert_many([
+            {"_id": "T1", "tenant": "default", "driver": "D1", "status": "completed", "loadWeight": 10000,
+             "incidents": 1, "startTime": OLD, "expectedEnd": OLD, "actualEnd": OLD},
+            {"_id": "T2", "tenant": "default", "driver": "D1", "status": "in-progress", "startTime": OLD, "expectedEnd": OLD},
+        ])
+        await db.trip_events.insert_many([
+            {"_id": "E1", "tenant": "default", "trip": "T1", "timestamp": OLD},
+            # Just as old, but its trip is still running
+            {"_id": "E2", "tenant": "default", "trip": "T2", "timestamp": OLD},
+        ])
+        await db.alerts.insert_one({"_id": "A1", "tenant": "default", "read": False, "timestamp": OLD})
+
+        result = await archive_history(db, alert_retention_days=30, trip_retention_days=90)
+        assert result == {"alerts": 0, "trips": 1, "tripEvents": 1}
+        assert await db.trips.distinct("_id") == ["T2"]
+        assert await db.trip_events_archive.distinct("_id") == ["E1"]
+        assert await db.trip_events.distinct("_id") == ["E2"]
+        totals = await db.driver_archive_totals.find_one({"tenant": "default", "driver": "D1"}, {"_id": 0})
+        assert totals == {"tenant": "default", "driver": "D1", "totalTrips": 1, "onTimeTrips": 1,
+                          "incidents": 1, "totalLoadKg": 10000}
+
+    asyncio.run(scenario())
+
+def test_archive_history_picks_up_events_left_by_an_interrupted_run(db):
+    async def scenario():
+        # The trip was archived, but the run died before moving its events
+        await db.trips_archive.insert_one({"_id": "T1", "tenant": "acme", "status": "completed", "actualEnd": OLD})
+        await db.trip_events.insert_one({"_id": "E1", "tenant": "acme", "trip": "T1", "timestamp": OLD})
+
+        result = await archive_history(db, alert_retention_days=30, trip_retention_days=90)
+        assert result["tripEvents"] == 1
+        assert await db.trip_events.count_documents({}) == 0
+
+    asyncio.run(scenario())
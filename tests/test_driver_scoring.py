@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from driver_scoring import fatigue_level, record_trip_completion, recompute_driver_scores, score_from_totals
+from models import DriverHours, User
+from routes.drivers import log_driver_hours, score_drivers
+
+def test_perfect_record_scores_full_marks():
+    performance, risk, on_time = score_from_totals(10, 10, 0, 10 * 20000)
+    assert (performance, risk, on_time) == (100, 0, 100)
+
+def test_scores_stay_in_bounds():
+    performance, risk, on_time = score_from_totals(2, 0, 50, 0)
+    assert (performance, risk, on_time) == (0, 100, 0)
+
+def test_no_trips_does_not_divide_by_zero():
+    performance, risk, on_time = score_from_totals(0, 0, 0, 0)
+    assert 0 <= performance <= 100 and 0 <= risk <= 100 and on_time == 0
+
+def test_series_and_scalars_agree():
+    totals = pd.DataFrame({"trips": [3, 8], "onTime": [2, 5], "incidents": [1, 0], "load": [54000, 80000]})
+    series = score_from_totals(totals["trips"], totals["onTime"], totals["incidents"], totals["load"])
+    for row in totals.itertuples():
+        scalars = score_from_totals(row.trips, row.onTime, row.incidents, row.load)
+        assert [int(column.iloc[row.Index]) for column in series] == [int(value) for value in scalars]
+
+def test_fatigue_level_caps_at_100():
+    assert fatigue_level(0) == 0
+    assert fatigue_level(5.5) == 50
+    assert fatigue_level(30) == 100
+
+def test_incremental_matches_batch(db):
+    now = datetime.now(timezone.utc)
+    trips = [
+        {"_id": f"T{i}", "tenant": "default", "driver": "D1", "status": "completed", "loadWeight": 15000,
+         "incidents": i % 2, "expectedEnd": now, "actualEnd": now + timedelta(hours=1 if i == 2 else -1)}
+        for i in range(4)
+    ]
+
+    async def scenario():
+        await db.drivers.insert_one({"_id": "D1", "tenant": "default", "totalTrips": 0, "onTimeTrips": 0, "incidents": 0, "totalLoadKg": 0})
+        for trip in trips:
+            await db.trips.insert_one(trip)
+            await record_trip_completion(db, trip)
+        incremental = await db.drivers.find_one({"_id": "D1"})
+
+        await db.drivers.update_one({"_id": "D1"}, {"$set": {"performanceScore": 0, "totalTrips": 0}})
+        assert await recompute_driver_scores(db) == 1
+        assert await db.drivers.find_one({"_id": "D1"}) == incremental
+        assert incremental["totalTrips"] == 4 and incremental["onTimeTrips"] == 3
+
+    asyncio.run(scenario())
+
+def test_stale_fatigue_does_not_overwrite_newer(db):
+    class LateShift:
+        """Proxy that lets another 5h shift land right after this call's $inc."""
+
+        def __init__(self, db):
+            self.db = db
+
+        def __getattr__(self, name):
+            return self if name == "drivers" else getattr(self.db, name)
+
+        async def find_one_and_update(self, *args, **kwargs):
+            driver = await self.db.drivers.find_one_and_update(*args, **kwargs)
+            await log_driver_hours("D1", DriverHours(hours=5), db=self.db, current_user=user)
+            return driver
+
+        async def update_one(self, *args, **kwargs):
+            return await self.db.drivers.update_one(*args, **kwargs)
+
+    user = User(email="ops@example.com", hashed_password="x", name="Ops")
+
+    async def scenario():
+        await db.drivers.insert_one({"_id": "D1", "tenant": "default", "name": "D", "hoursDriven": 0, "hoursSinceRest": 0})
+        await log_driver_hours("D1", DriverHours(hours=1), db=LateShift(db), current_user=user)
+        driver = await db.drivers.find_one({"_id": "D1"})
+        assert driver["hoursSinceRest"] == 6
+        assert driver["fatigueLevel"] == fatigue_level(6)
+
+    asyncio.run(scenario())
+
+def test_rescore_route_offloads_the_pandas_step(db):
+    offloaded = []
+
+    class Runner:
+        async def run_in_process(self, func, *args):
+            offloaded.append(func)
+            return func(*args)
+
+    admin = User(email="admin@example.com", hashed_password="x", name="Admin", role="admin")
+    now = datetime.now(timezone.utc)
+
+    async def scenario():
+        await db.drivers.insert_one({"_id": "D1", "tenant": "default"})
+        await db.trips.insert_one({"_id": "T1", "tenant": "default", "driver": "D1", "status": "completed",
+                                   "loadWeight": 20000, "expectedEnd": now, "actualEnd": now})
+        result = await score_drivers(db=db, runner=Runner(), current_user=admin)
+        assert result["updated"] == 1
+        assert [func.__name__ for func in offloaded] == ["score_trip_history"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from jobs import CronSchedule, Job, JobRunner
+
+def at(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+def test_cron_every_quarter_hour():
+    assert CronSchedule("*/15 * * * *").next_after(at(2026, 1, 1, 10, 7)) == at(2026, 1, 1, 10, 15)
+
+def test_cron_is_strictly_after():
+    assert CronSchedule("0 3 * * *").next_after(at(2026, 1, 1, 3, 0)) == at(2026, 1, 2, 3, 0)
+
+def test_cron_month_rollover():
+    assert CronSchedule("0 0 1 * *").next_after(at(2026, 1, 31, 12, 0)) == at(2026, 2, 1, 0, 0)
+
+def test_cron_year_rollover():
+    assert CronSchedule("0 0 1 1 *").next_after(at(2026, 10, 19, 3, 0)) == at(2027, 1, 1, 0, 0)
+    assert CronSchedule("30 23 31 12 *").next_after(at(2026, 12, 31, 23, 30)) == at(2027, 12, 31, 23, 30)
+
+def test_cron_weekday():
+    # 2026-10-19 is a Monday
+    assert CronSchedule("30 2 * * 1").next_after(at(2026, 10, 19, 3, 0)) == at(2026, 10, 26, 2, 30)
+    assert CronSchedule("0 9 * * 0").next_after(at(2026, 10, 19)) == CronSchedule("0 9 * * 7").next_after(at(2026, 10, 19))
+
+def test_cron_day_of_month_or_weekday():
+    # Both restricted: either the 13th or a Friday matches
+    schedule = CronSchedule("0 9 13 * 5")
+    assert schedule.next_after(at(2026, 10, 19)) == at(2026, 10, 23, 9, 0)
+    assert schedule.next_after(at(2026, 11, 6, 10, 0)) == at(2026, 11, 13, 9, 0)
+
+def test_cron_skips_short_months():
+    assert CronSchedule("0 0 31 * *").next_after(at(2026, 4, 1)) == at(2026, 5, 31, 0, 0)
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "5-1 * * * *", "*/0 * * * *"])
+def test_cron_rejects_invalid(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+def test_job_needs_exactly_one_schedule():
+    with pytest.raises(ValueError):
+        Job("x", None)
+    with pytest.raises(ValueError):
+        Job("x", None, interval=5, cron="* * * * *")
+
+def test_lease_handover_between_runners(db):
+    async def scenario():
+        first, second = JobRunner(db), JobRunner(db)
+        job = Job("scoring", None, interval=60)
+        until = datetime.now(timezone.utc) + timedelta(minutes=1)
+
+        assert await first._acquire_lease(job, until)
+        assert not await second._acquire_lease(job, until)
+        # The holder may renew its own lease
+        assert await first._acquire_lease(job, until)
+
+        # Once the lease expires the other worker takes over, and the old holder is locked out
+        await db.job_leases.update_one({"_id": "scoring"}, {"$set": {"expiresAt": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+        assert await second._acquire_lease(job, until)
+        assert not await first._acquire_lease(job, until)
+        lease = await db.job_leases.find_one({"_id": "scoring"})
+        assert lease["owner"] == second.worker_id
+
+    asyncio.run(scenario())
+
+def test_run_once_skips_when_leased_elsewhere(db):
+    async def scenario():
+        runs = []
+
+        async def work(ctx):
+            runs.append(ctx)
+
+        first, second = JobRunner(db), JobRunner(db)
+        assert await first.run_once(Job("archive", work, interval=60))
+        job = Job("archive", work, interval=60)
+        assert not await second.run_once(job)
+        assert len(runs) == 1
+        assert job.stats["skipped"] == 1
+
+    asyncio.run(scenario())
+
+def test_run_once_records_timeouts(db):
+    async def scenario():
+        job = Job("slow", lambda ctx: asyncio.sleep(1), interval=60, timeout=0.05, lease=False)
+        await JobRunner(db).run_once(job)
+        assert job.stats["timeouts"] == 1
+        assert job.stats["runs"] == 1
+
+    asyncio.run(scenario())
+
+def test_lease_is_taken_after_the_concurrency_slot(db):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def blocker(ctx):
+            await release.wait()
+
+        async def work(ctx):
+            pass
+
+        runner = JobRunner(db, max_concurrency=1)
+        busy = asyncio.create_task(runner.run_once(Job("archive", blocker, interval=60, lease=False)))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(runner.run_once(Job("scoring", work, interval=60, timeout=30)))
+        await asyncio.sleep(0.05)
+        # Still waiting for a slot, so no lease is held that could expire in the meantime
+        assert await db.job_leases.find_one({"_id": "scoring"}) is None
+        release.set()
+        assert await queued
+        await busy
+        lease = await db.job_leases.find_one({"_id": "scoring"})
+        assert lease["owner"] == runner.worker_id
+
+    asyncio.run(scenario())
+
+def test_schedule_survives_lease_errors():
+    class FlakyLeases:
+        calls = 0
+
+        async def find_one_and_update(self, *args, **kwargs):
+            FlakyLeases.calls += 1
+            raise ConnectionError("no primary")
+
+    async def scenario():
+        runner = JobRunner(SimpleNamespace(job_leases=FlakyLeases()))
+        job = Job("scoring", lambda ctx: asyncio.sleep(0), interval=0.01)
+        runner.add(job)
+        runner.start()
+        await asyncio.sleep(0.1)
+        assert not runner._tasks[0].done()
+        await runner.stop()
+        assert FlakyLeases.calls > 1
+        assert job.stats["failures"] == FlakyLeases.calls
+        assert job.stats["lastError"] == "no primary"
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from models import TenantUserCreate, User, UserCreate
+from routes.alerts import mark_alert_read
+from routes.auth import create_access_token, create_tenant_user, get_current_user, register
+from routes.drivers import get_drivers
+from routes.vehicles import get_vehicle, get_vehicles
+from tenancy import DEFAULT_TENANT, backfill_default_tenant, parse_tenant_databases
+
+def make_user(tenant):
+    return User(email=f"ops@{tenant}.example.com", hashed_password="x", name="Ops", tenant=tenant)
+
+def test_parse_tenant_databases():
+    assert parse_tenant_databases("") == {}
+    assert parse_tenant_databases(" acme:okgaadi_acme, globex:okgaadi_globex ,") == {
+        "acme": "okgaadi_acme",
+        "globex": "okgaadi_globex",
+    }
+    with pytest.raises(ValueError):
+        parse_tenant_databases("acme")
+
+def test_listings_only_return_own_tenant(db):
+    async def scenario():
+        await db.vehicles.insert_many([{"_id": "V1", "tenant": "acme"}, {"_id": "V2", "tenant": "globex"}])
+        await db.drivers.insert_many([{"_id": "D1", "tenant": "acme"}, {"_id": "D2", "tenant": "globex"}])
+        acme = make_user("acme")
+        assert [v["_id"] for v in await get_vehicles(db=db, current_user=acme)] == ["V1"]
+        assert [d["_id"] for d in await get_drivers(db=db, current_user=acme)] == ["D1"]
+
+    asyncio.run(scenario())
+
+def test_other_tenants_documents_are_not_found(db):
+    async def scenario():
+        await db.vehicles.insert_one({"_id": "V2", "tenant": "globex"})
+        await db.alerts.insert_one({"_id": "A2", "tenant": "globex", "read": False})
+        acme = make_user("acme")
+        with pytest.raises(HTTPException) as vehicle:
+            await get_vehicle("V2", db=db, current_user=acme)
+        assert vehicle.value.status_code == 404
+        with pytest.raises(HTTPException) as alert:
+            await mark_alert_read("A2", db=db, current_user=acme)
+        assert alert.value.status_code == 404
+        assert (await db.alerts.find_one({"_id": "A2"}))["read"] is False
+
+    asyncio.run(scenario())
+
+def test_token_tenant_must_match_user(db):
+    async def scenario():
+        await db.users.insert_one({"email": "ops@acme.example.com", "hashed_password": "x", "name": "Ops", "tenant": "acme"})
+        token = create_access_token({"sub": "ops@acme.example.com", "tenant": "acme"})
+        assert (await get_current_user(token=token, db=db)).tenant == "acme"
+        forged = create_access_token({"sub": "ops@acme.example.com", "tenant": "globex"})
+        with pytest.raises(HTTPException) as error:
+            await get_current_user(token=forged, db=db)
+        assert error.value.status_code == 401
+
+    asyncio.run(scenario())
+
+def test_backfill_assigns_default_tenant(db):
+    async def scenario():
+        await db.trips.insert_many([{"_id": "T1"}, {"_id": "T2", "tenant": "acme"}])
+        await backfill_default_tenant(db)
+        assert (await db.trips.find_one({"_id": "T1"}))["tenant"] == DEFAULT_TENANT
+        assert (await db.trips.find_one({"_id": "T2"}))["tenant"] == "acme"
+
+    asyncio.run(scenario())
+
+def test_sign_up_gets_its_own_empty_tenant(db):
+    async def scenario():
+        await db.vehicles.insert_one({"_id": "V1", "tenant": DEFAULT_TENANT})
+        first = await register(UserCreate(email="a@example.com", password="pw", name="A", role="user"), db=db)
+        second = await register(UserCreate(email="b@example.com", password="pw", name="B"), db=db)
+        assert first.role == "admin"
+        assert len({first.tenant, second.tenant, DEFAULT_TENANT}) == 3
+        assert await get_vehicles(db=db, current_user=first) == []
+
+        invited = await create_tenant_user(
+            TenantUserCreate(email="c@example.com", password="pw", name="C", role="user"), db=db, current_user=first
+        )
+        assert (invited.tenant, invited.role) == (first.tenant, "user")
+
+    asyncio.run(scenario())
@@ -0,0 +1,219 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from models import Trip, TripCreate, TripEventCreate, User
+from routes.trips import create_trip, create_trip_event, get_trips
+from trip_lifecycle import (
+    InvalidTransition,
+    ProgressCoalescer,
+    TripNotFound,
+    apply_trip_event,
+    finish_pending_trip_events,
+)
+
+def make_trip(status, tenant="default"):
+    now = datetime.now(timezone.utc)
+    return {
+        "_id": "TRP1",
+        "tenant": tenant,
+        "route": "RT1",
+        "vehicle": "VH1",
+        "driver": "DRV1",
+        "status": status,
+        "loadWeight": 1000,
+        "startTime": now,
+        "expectedEnd": now + timedelta(hours=2),
+        "breakdownRisk": 10,
+        "aiConfidence": 90,
+        "progress": 0,
+    }
+
+@pytest.mark.parametrize("status, event", [
+    ("scheduled", "complete"),
+    ("in-progress", "start"),
+    ("completed", "cancel"),
+    ("completed", "start"),
+    ("cancelled", "complete"),
+])
+def test_invalid_transitions_are_rejected(db, status, event):
+    async def scenario():
+        await db.trips.insert_one(make_trip(status))
+        with pytest.raises(InvalidTransition):
+            await apply_trip_event(db, "default", "TRP1", TripEventCreate(type=event))
+        trip = await db.trips.find_one({"_id": "TRP1"})
+        assert trip["status"] == status
+        assert await db.trip_events.count_documents({}) == 0
+
+    asyncio.run(scenario())
+
+def test_unknown_event_is_rejected(db):
+    async def scenario():
+        await db.trips.insert_one(make_trip("scheduled"))
+        with pytest.raises(InvalidTransition):
+            await apply_trip_event(db, "default", "TRP1", TripEventCreate(type="teleport"))
+
+    asyncio.run(scenario())
+
+def test_route_maps_transition_errors_to_http(db):
+    user = User(email="ops@example.com", hashed_password="x", name="Ops")
+
+    async def scenario():
+        await db.trips.insert_one(make_trip("completed"))
+        with pytest.raises(HTTPException) as conflict:
+            await create_trip_event("TRP1", TripEventCreate(type="cancel"), db=db, current_user=user)
+        assert conflict.value.status_code == 409
+        with pytest.raises(HTTPException) as missing:
+            await create_trip_event("NOPE", TripEventCreate(type="start"), db=db, current_user=user)
+        assert missing.value.status_code == 404
+
+    asyncio.run(scenario())
+
+def test_other_tenants_trip_is_not_found(db):
+    async def scenario():
+        await db.trips.insert_one(make_trip("scheduled", tenant="acme"))
+        with pytest.raises(TripNotFound):
+            await apply_trip_event(db, "default", "TRP1", TripEventCreate(type="start"))
+
+    asyncio.run(scenario())
+
+def test_full_lifecycle_updates_totals_and_log(db):
+    async def scenario():
+        await db.trips.insert_one(make_trip("scheduled"))
+        await db.vehicles.insert_one({"_id": "VH1", "tenant": "default", "totalTrips": 5, "totalKm": 100})
+        await db.drivers.insert_one({"_id": "DRV1", "tenant": "default", "totalTrips": 0, "onTimeTrips": 0, "incidents": 0, "totalLoadKg": 0})
+
+        started = await apply_trip_event(db, "default", "TRP1", TripEventCreate(type="start"))
+        assert started["status"] == "in-progress"
+        assert started["actualStart"] is not None
+        done = await apply_trip_event(db, "default", "TRP1", TripEventCreate(type="complete", distanceKm=40))
+        assert done["status"] == "completed" and done["progress"] == 100
+
+        vehicle = await db.vehicles.find_one({"_id": "VH1"})
+        assert (vehicle["totalTrips"], vehicle["totalKm"]) == (6, 140)
+        driver = await db.drivers.find_one({"_id": "DRV1"})
+        assert driver["totalTrips"] == 1 and driver["onTimeTrips"] == 1
+        events = await db.trip_events.find({"trip": "TRP1"}).sort("timestamp", 1).to_list(None)
+        assert [(e["fromStatus"], e["toStatus"]) for e in events] == [("scheduled", "in-progress"), ("in-progress", "completed")]
+
+    asyncio.run(scenario())
+
+def test_coalescer_keeps_furthest_progress_per_tenant(db):
+    async def scenario():
+        await db.trips.insert_one({"_id": "T1", "tenant": "default", "status": "in-progress", "progress": 0})
+        coalescer = ProgressCoalescer(SimpleNamespace(for_tenant=lambda tenant: db))
+        for progress in (10, 60, 30):
+            coalescer.submit("default", "T1", progress)
+        # Same trip id under another tenant must not touch this trip
+        coalescer.submit("acme", "T1", 90)
+        assert await coalescer.flush() == 2
+        assert (await db.trips.find_one({"_id": "T1"}))["progress"] == 60
+
+    asyncio.run(scenario())
+
+def test_coalescer_requeues_on_write_failure(db):
+    async def failing_write(*args, **kwargs):
+        raise RuntimeError("primary unavailable")
+
+    broken = SimpleNamespace(trips=SimpleNamespace(bulk_write=failing_write))
+
+    async def scenario():
+        await db.trips.insert_one({"_id": "T1", "tenant": "default", "status": "in-progress", "progress": 0})
+        coalescer = ProgressCoalescer(SimpleNamespace(for_tenant=lambda tenant: broken if tenant == "acme" else db))
+        coalescer.submit("acme", "A1", 40)
+        coalescer.submit("default", "T1", 50)
+        with pytest.raises(RuntimeError):
+            await coalescer.flush()
+        # The healthy tenant was written, the failed one is kept for the next flush
+        assert (await db.trips.find_one({"_id": "T1"}))["progress"] == 50
+        coalescer.submit("acme", "A1", 20)
+        assert coalescer._pending == {"acme": {"A1": 40}}
+
+    asyncio.run(scenario())
+
+def test_trips_with_legacy_statuses_still_list(db):
+    async def scenario():
+        await db.trips.insert_one(make_trip("delayed"))
+        trips = await get_trips(db=db, current_user=User(email="ops@example.com", hashed_password="x", name="Ops"))
+        assert [Trip.model_validate(trip).status for trip in trips] == ["delayed"]
+
+    asyncio.run(scenario())
+
+def test_create_trip_ignores_server_counters(db):
+    user = User(email="ops@example.com", hashed_password="x", name="Ops", tenant="acme")
+    plan = make_trip("in-progress")
+    plan.update({"distanceKm": 100000, "incidents": 7, "progress": 90})
+
+    async def scenario():
+        trip = await create_trip(TripCreate(**plan), db=db, current_user=user)
+        stored = await db.trips.find_one({"_id": trip.id})
+        assert (stored["distanceKm"], stored["incidents"], stored["progress"]) == (0, 0, 0)
+        assert stored["tenant"] == "acme" and stored["actualStart"] is not None
+
+    asyncio.run(scenario())
+
+class FailingVehicles:
+    """Database proxy whose next vehicles.update_one raises, as if the primary went away."""
+
+    def __init__(self, db):
+        self.db = db
+        self.fail = True
+
+    def __getattr__(self, name):
+        if name == "vehicles":
+            return self
+        return getattr(self.db, name)
+
+    async def update_one(self, *args, **kwargs):
+        if self.fail:
+            self.fail = False
+            raise ConnectionError("no primary")
+        return await self.db.vehicles.update_one(*args, **kwargs)
+
+async def seed_lifecycle(db):
+    await db.trips.insert_one(make_trip("in-progress"))
+    await db.vehicles.insert_one({"_id": "VH1", "tenant": "default", "totalTrips": 5, "totalKm": 100})
+    await db.drivers.insert_one({"_id": "DRV1", "tenant": "default", "totalTrips": 0, "onTimeTrips": 0, "incidents": 0, "totalLoadKg": 0})
+
+async def assert_counted_once(db):
+    vehicle = await db.vehicles.find_one({"_id": "VH1"})
+    assert (vehicle["totalTrips"], vehicle["totalKm"], vehicle["pendingTrips"]) == (6, 140, [])
+    driver = await db.drivers.find_one({"_id": "DRV1"})
+    assert (driver["totalTrips"], driver["pendingTrips"]) == (1, [])
+    assert await db.trip_events.count_documents({"trip": "TRP1"}) == 1
+    assert "pendingEvent" not in await db.trips.find_one({"_id": "TRP1"})
+
+def test_retried_event_finishes_interrupted_follow_ups(db):
+    async def scenario():
+        await seed_lifecycle(db)
+        with pytest.raises(ConnectionError):
+            await apply_trip_event(FailingVehicles(db), "default", "TRP1", TripEventCreate(type="complete", distanceKm=40))
+        assert (await db.trips.find_one({"_id": "TRP1"}))["status"] == "completed"
+
+        trip = await apply_trip_event(db, "default", "TRP1", TripEventCreate(type="complete", distanceKm=40))
+        assert trip["status"] == "completed"
+        await assert_counted_once(db)
+        # Once finished, the event cannot be applied a second time
+        with pytest.raises(InvalidTransition):
+            await apply_trip_event(db, "default", "TRP1", TripEventCreate(type="complete"))
+
+    asyncio.run(scenario())
+
+def test_sweeper_finishes_abandoned_events(db):
+    async def scenario():
+        await seed_lifecycle(db)
+        with pytest.raises(ConnectionError):
+            await apply_trip_event(FailingVehicles(db), "default", "TRP1", TripEventCreate(type="complete", distanceKm=40))
+        # Too recent: the request may still be finishing it
+        assert await finish_pending_trip_events(db) == 0
+        stale = datetime.now(timezone.utc) - timedelta(minutes=10)
+        await db.trips.update_one({"_id": "TRP1"}, {"$set": {"pendingEvent.event.timestamp": stale}})
+        assert await finish_pending_trip_events(db) == 1
+        await assert_counted_once(db)
+        assert await finish_pending_trip_events(db) == 0
+        await assert_counted_once(db)
+
+    asyncio.run(scenario())